@@ -0,0 +1,61 @@
+from globals import *
+
+# Penalty of a pairing that must never happen
+HARD = float('inf')
+
+# Mapping of known pairing constraints to the players file column they compare
+_constraint_to_column = {
+    'same_team'  : 'Team',
+    'same_club'  : 'Club',
+    'same_race'  : 'Race',
+}
+
+class PairingConstraints:
+    """
+    Pairing constraints compiled into a penalty adjacency map.
+    Only the pairs that are forbidden (rematches, hard constraints) or
+    discouraged (soft constraints, one point per constraint broken) are
+    stored, so checking a candidate pairing is a constant time lookup.
+    """
+
+    def __init__(self, players_dict, prev_games=(), rules=None):
+        self._penalty = {}
+        for p1, p2 in prev_games:
+            self.add(p1, p2, HARD)
+
+        if rules is None:
+            rules = config.get('pairing_constraints') or {}
+        for rule, mode in rules.items():
+            if rule not in _constraint_to_column:
+                raise ValueError(f"Unknown pairing constraint '{rule}'")
+            # YAML reads unquoted on/off as booleans
+            mode = {True: 'hard', False: 'off', None: 'off'}.get(mode, mode)
+            if mode not in ('hard', 'soft', 'off'):
+                raise ValueError(f"Pairing constraint '{rule}' must be hard, soft or off, not '{mode}'")
+            if mode == 'off':
+                continue
+            column = _constraint_to_column[rule]
+
+            # Group players sharing the same value, every pair of a group is constrained
+            groups = {}
+            for player, pdata in players_dict.items():
+                if pdata.get(column):
+                    groups.setdefault(pdata[column], []).append(player)
+            for group in groups.values():
+                for i, p1 in enumerate(group):
+                    for p2 in group[i + 1:]:
+                        self.add(p1, p2, HARD if mode == 'hard' else 1)
+
+    def add(self, p1, p2, penalty):
+        """
+        Add a penalty to the pairing of p1 and p2 (in either order).
+        """
+        for a, b in ((p1, p2), (p2, p1)):
+            opponents = self._penalty.setdefault(a, {})
+            opponents[b] = opponents.get(b, 0) + penalty
+
+    def penalty(self, p1, p2):
+        return self._penalty.get(p1, {}).get(p2, 0)
+
+    def allowed(self, p1, p2):
+        return self.penalty(p1, p2) != HARD
@@ -0,0 +1,222 @@
+import hashlib
+import pickle
+import logging as log
+
+from pathlib import Path
+from globals import *
+
+_missing_backend_warned = False
+
+# Columns that are not tracked statistics (those are always written as float64)
+_string_columns = {'player', 'team', 'opponent', 'opponent_team', 'result', 'race', 'opponent_race'}
+_int_columns = {'round', 'table'}
+
+def exportBackend():
+    """
+    Return the name of the columnar backend available ('parquet', 'npz'),
+    or None if neither pyarrow nor numpy is installed.
+    Backends are only imported when an export is requested, pyarrow first.
+    """
+    try:
+        import pyarrow, pyarrow.parquet
+        return 'parquet'
+    except ImportError:
+        pass
+    try:
+        import numpy
+        return 'npz'
+    except ImportError:
+        return None
+
+def columnType(name):
+    """
+    Return the type of a column ('string', 'int64' or 'float64'), fixed for every
+    round so that partitions share the same schema whatever values they hold.
+    """
+    if name in _string_columns:
+        return 'string'
+    if name in _int_columns or name in config['base_statistics']:
+        return 'int64'
+    return 'float64'
+
+def gameHistoryColumns(round_number, round_data, players_dict):
+    """
+    Flatten a round into one row per game and per side.
+    Race and tier of both players are read from players_dict, as individual
+    round files have no tier columns.
+    Returns a dictionary of columns (column name -> list of values).
+    """
+    header = round_data[0]
+    has_team = 'TeamA' in header and 'TeamB' in header
+    team_size = int(config.get('team_size', 1))
+    extra_stats = [stat for stat in config['statistics'] + config['additional_statistics']
+                   if stat not in config['base_statistics'] and stat != 'tier']
+
+    columns = {
+        'round': [], 'table': [],
+        'player': [], 'team': [], 'race': [], 'tier': [],
+        'opponent': [], 'opponent_team': [], 'opponent_race': [], 'opponent_tier': [],
+        'touchdown_scored': [], 'touchdown_conceded': [], 'result': [],
+    }
+    for stat in extra_stats:
+        columns[stat] = []
+
+    for row_index, game in enumerate(round_data[1:], start=1):
+        # A table holds the team_size games of a team pairing
+        table = (row_index - 1) // team_size + 1 if team_size > 1 else row_index
+        for side, other in (('A', 'B'), ('B', 'A')):
+            player = game[header.index(f'Player{side}')]
+            if player == 'BYE':
+                continue
+            td_for = game[header.index(f'Touchdown{side}')]
+            td_against = game[header.index(f'Touchdown{other}')]
+            td_for = int(td_for) if td_for != '' else None
+            td_against = int(td_against) if td_against != '' else None
+            if td_for is None or td_against is None:
+                result = ''
+            elif td_for > td_against:
+                result = 'W'
+            elif td_for == td_against:
+                result = 'D'
+            else:
+                result = 'L'
+
+            columns['round'].append(round_number)
+            columns['table'].append(table)
+            opponent = game[header.index(f'Player{other}')]
+            columns['player'].append(player)
+            columns['team'].append(game[header.index(f'Team{side}')] if has_team else '')
+            columns['race'].append(players_dict.get(player, {}).get('Race', ''))
+            columns['tier'].append(players_dict.get(player, {}).get('tier'))
+            columns['opponent'].append(opponent)
+            columns['opponent_team'].append(game[header.index(f'Team{other}')] if has_team else '')
+            columns['opponent_race'].append(players_dict.get(opponent, {}).get('Race', ''))
+            columns['opponent_tier'].append(players_dict.get(opponent, {}).get('tier'))
+            columns['touchdown_scored'].append(td_for)
+            columns['touchdown_conceded'].append(td_against)
+            columns['result'].append(result)
+            for stat in extra_stats:
+                col = f'{stat}{side}'
+                val = game[header.index(col)] if col in header else ''
+                columns[stat].append(float(val) if val != '' else None)
+    return columns
+
+def standingsColumns(round_number, stats, key='player', players_dict=None):
+    """
+    Snapshot a standings dictionary (as returned by updateStats or
+    updateTeamStats) into a dictionary of columns.
+    If players_dict is given, the race of each player is added and tier is
+    the tier of that race.
+    """
+    stat_names = config['statistics'] + config['additional_statistics']
+    columns = {'round': [], key: []}
+    if players_dict is not None:
+        columns['race'] = []
+    for stat in stat_names:
+        columns[stat] = []
+    for name, s in stats.items():
+        columns['round'].append(round_number)
+        columns[key].append(name)
+        if players_dict is not None:
+            columns['race'].append(players_dict.get(name, {}).get('Race', ''))
+        for stat in stat_names:
+            if stat == 'tier' and players_dict is not None:
+                columns[stat].append(players_dict.get(name, {}).get('tier'))
+            else:
+                columns[stat].append(s.get(stat, 0))
+    return columns
+
+def partitionPath(dataset, round_number, backend, folder='stats/export'):
+    """
+    Return the path of one round partition of a dataset for the given backend.
+    """
+    if backend == 'parquet':
+        return Path(folder) / dataset / f'round={round_number}' / 'part-0.parquet'
+    return Path(folder) / dataset / f'round{round_number}.npz'
+
+def exportKeys(rounds):
+    """
+    Return one key per round, hashing the configuration, the players and every
+    round up to that one: the partitions of a round only have to be written
+    again when its key changes.
+    """
+    digest = hashlib.sha256(fileHash(config_file, config['players_file'], 'config/tiers.yaml', __file__).encode('utf-8'))
+    keys = []
+    for round_data in rounds:
+        digest.update(repr(round_data).encode('utf-8'))
+        keys.append(digest.hexdigest())
+    return keys
+
+def writeColumns(columns, dataset, round_number, folder='stats/export'):
+    """
+    Write one round partition of a dataset.
+    Parquet partitions follow the hive layout (<dataset>/round=<n>/part-0.parquet)
+    so that a reader can load the whole dataset and select only the columns it needs.
+    An existing partition for the same round is overwritten.
+    """
+    backend = exportBackend()
+    if backend is None:
+        return None
+
+    path = partitionPath(dataset, round_number, backend, folder)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if backend == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # The partition key is carried by the folder name
+        names = [name for name in columns if name != 'round']
+        schema = pa.schema([(name, columnType(name)) for name in names])
+        table = pa.table({name: pa.array(columns[name], type=schema.field(name).type) for name in names}, schema=schema)
+        pq.write_table(table, path)
+    else:
+        import numpy as np
+        arrays = {}
+        for name, values in columns.items():
+            kind = columnType(name)
+            if kind == 'string':
+                arrays[name] = np.array(['' if v is None else str(v) for v in values], dtype=np.str_)
+            elif kind == 'int64':
+                # npz has no missing integers, -1 marks a missing score
+                arrays[name] = np.array([-1 if v is None else v for v in values], dtype=np.int64)
+            else:
+                arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        np.savez_compressed(path, **arrays)
+    log.debug(f'{path} saved.')
+    return path
+
+def exportRound(round_number, round_data, stats, team_stats=None, players_dict=None, key=None, folder='stats/export'):
+    """
+    Export the game history and the standings snapshot of one round.
+    Must be called right after the round's stats are computed, as the
+    stats dictionaries are updated in place by the following rounds.
+    If key (cf. exportKeys) is given, the round is skipped when its partitions
+    were already written with the same key.
+    """
+    global _missing_backend_warned
+    backend = exportBackend()
+    if backend is None:
+        if not _missing_backend_warned:
+            log.warning('Neither pyarrow nor numpy is installed, skipping columnar export')
+            _missing_backend_warned = True
+        return
+
+    datasets = ['games', 'standings'] + (['team_standings'] if team_stats else [])
+    manifest_path = Path(folder) / 'manifest.pickle'
+    try:
+        with open(manifest_path, mode='rb') as file:
+            manifest = pickle.load(file)
+    except Exception:
+        manifest = {}
+    if key is not None and manifest.get((backend, round_number)) == key \
+            and all(partitionPath(dataset, round_number, backend, folder).exists() for dataset in datasets):
+        log.debug(f'Round {round_number} already exported')
+        return
+
+    writeColumns(gameHistoryColumns(round_number, round_data, players_dict or {}), 'games', round_number, folder)
+    writeColumns(standingsColumns(round_number, stats, 'player', players_dict), 'standings', round_number, folder)
+    if team_stats:
+        writeColumns(standingsColumns(round_number, team_stats, 'team'), 'team_standings', round_number, folder)
+    if key is not None:
+        manifest[(backend, round_number)] = key
+        with open(manifest_path, mode='wb') as file:
+            pickle.dump(manifest, file)
@@ -1,24 +1,25 @@
 import argparse
-import yaml
+import copy
+import hashlib
+import os
+import pickle
+
+from pathlib import Path
 
 version = 0.1
-with open('config/config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+config_file = 'config/config.yaml'
+snapshot_file = 'config/.snapshot.pickle'
 
 # Global argparse setup
 parser = argparse.ArgumentParser(description='Touchdown Tracker')
 parser.add_argument('--loglevel', type=str, default='INFO', help='Set logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)')
+parser.add_argument('--repair', type=int, metavar='ROUND', help='Repair the pairing of the last round after late drops or additions (see --drop and --add)')
+parser.add_argument('--drop', nargs='+', default=[], metavar='NAME', help='Players or teams withdrawn from the repaired round')
+parser.add_argument('--add', nargs='+', default=[], metavar='NAME', help='Players or teams added to the repaired round')
+parser.add_argument('--speculate', action='store_true', help='Precompute the next round for every outcome of the games still in progress')
+parser.add_argument('--export', action='store_true', help='Export game history and standings as columnar files in stats/export/')
 args = parser.parse_args()
 
-# Base stats to track
-config['base_statistics'] = [
-    'rank', 'points',
-    'wins', 'draws', 'losses',
-    'touchdown_scored', 'touchdown_conceded', 'touchdown_diff'
-]
-
-_stats = config['base_statistics'].copy()
-
 # Mapping of known tie-breaker to the stats they require
 _tie_break_to_stat = {
     'wins'              : 'wins',
@@ -33,26 +34,117 @@ _tie_break_to_stat = {
     'touchdowns'        : 'touchdown_diff',
 }
 
-# Process individual tie_breakers from config
-for tie_break in config.get('indiv_tie_breakers', []):
-    if tie_break in _tie_break_to_stat:
-        _stats.append(_tie_break_to_stat[tie_break])
-
-# Process team tie_breakers from config
-for tie_break in config.get('team_tie_breakers', []):
-    if tie_break in _tie_break_to_stat:
-        _stats.append(_tie_break_to_stat[tie_break])
-
-# Remove duplicates while preserving order
-seen = set()
-unique_stats = []
-for s in _stats:
-    if s not in seen:
-        seen.add(s)
-        unique_stats.append(s)
-
-# Attach deduplicated statistics to the loaded config
-config['statistics'] = unique_stats
-
-# Include any additional statistics that aren't already in _stats
-config['additional_statistics'] = [stat for stat in config['additional_statistics'] if stat not in _stats]
\ No newline at end of file
+# Tie-breakers where the lowest value ranks first, all others rank highest first
+_ascending_tie_breaks = {'defense'}
+
+def compileTieBreakers(tie_breakers):
+    """
+    Compile a list of tie breakers into a sort key function.
+    Each tie breaker is resolved once to its stat and direction, so the
+    returned key can be applied to a player (or team) stats dictionary
+    without looking up the configuration again. Sorting ascending on the
+    key puts the best ranked first.
+    """
+    fields = []
+    for tie_break in tie_breakers:
+        if tie_break in _tie_break_to_stat:
+            fields.append((_tie_break_to_stat[tie_break], -1 if tie_break not in _ascending_tie_breaks else 1))
+
+    # If no tie breakers defined, fall back to points and touchdown_scored
+    if not fields:
+        fields = [('points', -1), ('touchdown_scored', -1)]
+
+    def sort_key(stats):
+        return tuple(sign * stats.get(stat, 0) for stat, sign in fields)
+    sort_key.fields = fields
+    return sort_key
+
+def resolveConfig(config):
+    """
+    Derive the statistics to track from the loaded configuration.
+    """
+    # Base stats to track
+    config['base_statistics'] = [
+        'rank', 'points',
+        'wins', 'draws', 'losses',
+        'touchdown_scored', 'touchdown_conceded', 'touchdown_diff'
+    ]
+
+    _stats = config['base_statistics'].copy()
+
+    # Process individual tie_breakers from config
+    for tie_break in config.get('indiv_tie_breakers', []):
+        if tie_break in _tie_break_to_stat:
+            _stats.append(_tie_break_to_stat[tie_break])
+
+    # Process team tie_breakers from config
+    for tie_break in config.get('team_tie_breakers', []):
+        if tie_break in _tie_break_to_stat:
+            _stats.append(_tie_break_to_stat[tie_break])
+
+    # Remove duplicates while preserving order
+    seen = set()
+    unique_stats = []
+    for s in _stats:
+        if s not in seen:
+            seen.add(s)
+            unique_stats.append(s)
+
+    # Attach deduplicated statistics to the loaded config
+    config['statistics'] = unique_stats
+
+    # Include any additional statistics that aren't already in _stats
+    config['additional_statistics'] = [stat for stat in config['additional_statistics'] if stat not in _stats]
+    return config
+
+def fileHash(*paths):
+    """
+    Hash the content of the given files, missing files being skipped.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+def loadSnapshot():
+    """
+    Load the compiled snapshot (resolved configuration, players, rosters and tiers)
+    saved by a previous run. Returns an empty snapshot if there is none.
+    """
+    try:
+        with open(snapshot_file, mode='rb') as file:
+            return pickle.load(file)
+    except Exception:
+        return {}
+
+def saveSnapshot(snapshot):
+    """
+    Save the compiled snapshot, replacing the previous one atomically
+    so that concurrent runs never read a partial file.
+    """
+    tmp_file = f'{snapshot_file}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_file, mode='wb') as file:
+            pickle.dump(snapshot, file)
+        os.replace(tmp_file, snapshot_file)
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+# Reuse the configuration resolved by a previous run if config.yaml (or this file) did not change,
+# yaml is only imported when it has to be parsed again
+config_hash = fileHash(config_file, __file__)
+snapshot = loadSnapshot()
+if snapshot.get('config_hash') == config_hash:
+    config = copy.deepcopy(snapshot['config'])
+else:
+    import yaml
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = resolveConfig(yaml.safe_load(f))
+    snapshot = {'config_hash': config_hash, 'config': copy.deepcopy(config), 'players': {}}
+    saveSnapshot(snapshot)
+
+# Compiled ranking keys
+indiv_sort_key = compileTieBreakers(config.get('indiv_tie_breakers', []))
+team_sort_key = compileTieBreakers(config.get('team_tie_breakers', []))
@@ -0,0 +1,109 @@
+from bisect import bisect_left
+
+# Above this share of the field, an update sorts the whole standings once instead of moving entries
+_rebuild_ratio = 0.25
+
+class Ranking:
+    """
+    Standings kept in order by a compiled tie-break key (cf. compileTieBreakers).
+    Entries are stored in a sorted list as (key, seq, name) tuples, where seq is
+    always the position of the entry, so that ties keep their previous order.
+    Updating the stats of a few players only moves those players, instead of
+    sorting the whole field again: finding their new position is O(log n), but
+    list.insert/del and _renumber rewrite the entries between their old and new
+    positions, so an update costs O(span) (O(n) at worst), not O(log n).
+    """
+
+    def __init__(self, sort_key):
+        self.sort_key = sort_key
+        self._order = []    # sorted (key, seq, name) entries
+        self._entries = {}  # name -> current entry in _order
+
+    def __len__(self):
+        return len(self._order)
+
+    def __iter__(self):
+        return (name for _, _, name in self._order)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def index(self, name):
+        """
+        Return the 0-based position of a player (or team) in the standings.
+        """
+        return self._entries[name][1]
+
+    def rank(self, name):
+        return self.index(name) + 1
+
+    def update(self, stats, names):
+        """
+        Re-rank the given players (or teams) after their stats changed.
+        Ties are broken by the previous order, unknown names being added after
+        the existing entries they tie with: the result is the same as a stable
+        sort of the whole field. Every entry whose rank changed gets its 'rank'
+        stat rewritten. Returns the range of positions that were rewritten.
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return range(0)
+        if len(names) > _rebuild_ratio * len(self._order):
+            return self._rebuild(stats, names)
+
+        old_positions = {name: self._entries[name][1] for name in names if name in self._entries}
+        grows = len(old_positions) < len(names)
+
+        # Untouched entries keep their old position as seq, moved ones get theirs back
+        for position in sorted(old_positions.values(), reverse=True):
+            del self._order[position]
+        next_seq = len(self._order) + len(old_positions)
+        new_entries = []
+        for name in names:
+            seq = old_positions.get(name)
+            if seq is None:
+                seq = next_seq
+                next_seq += 1
+            entry = (self.sort_key(stats[name]), seq, name)
+            self._order.insert(bisect_left(self._order, entry), entry)
+            new_entries.append(entry)
+
+        # Entries outside of the span of the old and new positions keep their position
+        positions = list(old_positions.values()) + [bisect_left(self._order, entry) for entry in new_entries]
+        first = min(positions)
+        last = len(self._order) - 1 if grows else max(positions)
+        return self._renumber(stats, first, last)
+
+    def _rebuild(self, stats, names):
+        """
+        Re-rank by sorting the whole field once, for updates touching most of it.
+        """
+        changed = set(names)
+        entries = [(self.sort_key(stats[name]) if name in changed else key, seq, name)
+                   for key, seq, name in self._order]
+        next_seq = len(entries)
+        for name in names:
+            if name not in self._entries:
+                entries.append((self.sort_key(stats[name]), next_seq, name))
+                next_seq += 1
+        entries.sort()
+        self._order = entries
+        return self._renumber(stats, 0, len(entries) - 1)
+
+    def _renumber(self, stats, first, last):
+        """
+        Set seq back to the position of the entries from first to last, and rewrite their rank.
+        """
+        for position in range(first, last + 1):
+            key, _, name = self._order[position]
+            entry = (key, position, name)
+            self._order[position] = entry
+            self._entries[name] = entry
+            stats[name]['rank'] = position + 1
+        return range(first, last + 1)
+
+    def standings(self, stats):
+        """
+        Return the stats dictionary ordered by rank.
+        """
+        return {name: stats[name] for name in self}
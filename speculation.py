@@ -0,0 +1,130 @@
+import hashlib
+import pickle
+import logging as log
+
+from pathlib import Path
+from globals import *
+from utils import loadRound
+
+# Scores used to fill a game still in progress for each possible outcome (from player A's point of view)
+outcome_scores = {
+    'W': ('1', '0'),
+    'D': ('0', '0'),
+    'L': ('0', '1'),
+}
+
+# Stats an outcome sets exactly, the others (touchdowns, casualties...) are only known once the scores are entered
+_predicted_stats = {'points', 'wins', 'draws', 'losses', 'tier'}
+
+def unpredictedTieBreakers():
+    """
+    Return the stats used by the tie breakers that an outcome does not predict.
+    With any of them, the actual standings almost never match a speculated one.
+    """
+    sort_keys = [indiv_sort_key] + ([team_sort_key] if int(config.get('team_size', 1)) > 1 else [])
+    return sorted({stat for sort_key in sort_keys for stat, _ in sort_key.fields if stat not in _predicted_stats})
+
+def pendingGames(rows):
+    """
+    Return the indices (in rows, header first) of the games with missing scores.
+    Empty tables left by a repair (BYE against BYE) are not games.
+    """
+    header = rows[0]
+    pA_index = header.index('PlayerA')
+    pB_index = header.index('PlayerB')
+    tdA_index = header.index('TouchdownA')
+    tdB_index = header.index('TouchdownB')
+    return [idx for idx, game in enumerate(rows) if idx > 0 and (game[tdA_index] == '' or game[tdB_index] == '')
+            and not game[pA_index] == game[pB_index] == 'BYE']
+
+def gameOutcome(header, game):
+    """
+    Return the outcome ('W', 'D' or 'L') of a game for player A.
+    """
+    tdA, tdB = int(game[header.index('TouchdownA')]), int(game[header.index('TouchdownB')])
+    return 'W' if tdA > tdB else 'D' if tdA == tdB else 'L'
+
+def fillOutcome(rows, pending, outcome):
+    """
+    Return a copy of rows where the pending games are given the scores of outcome.
+    """
+    header = rows[0]
+    tdA_index = header.index('TouchdownA')
+    tdB_index = header.index('TouchdownB')
+    filled = [list(game) for game in rows]
+    for idx, result in zip(pending, outcome):
+        filled[idx][tdA_index], filled[idx][tdB_index] = outcome_scores[result]
+    return filled
+
+def roundFingerprint(round_number, pending):
+    """
+    Hash everything a speculation depends on: configuration, players, previous rounds
+    and the finished games of the round. Only the players of the pending games are
+    hashed, so the fingerprint stays the same when their scores are entered.
+    """
+    digest = hashlib.sha256()
+    paths = ['config/config.yaml', config['players_file']] + [f'rounds/round{i}.csv' for i in range(1, round_number)]
+    for path in paths:
+        digest.update(Path(path).read_bytes())
+    rows = loadRound(f'rounds/round{round_number}.csv')
+    header = rows[0]
+    name_columns = [idx for idx, h in enumerate(header) if h in ('PlayerA', 'PlayerB', 'TeamA', 'TeamB')]
+    for idx, game in enumerate(rows):
+        if idx in pending:
+            game = [game[col] for col in name_columns]
+        digest.update(repr(game).encode('utf-8'))
+    return digest.hexdigest()
+
+def standingsSignature(stats_dict, team_stats):
+    """
+    Everything from the standings the next pairing depends on: rank order and points.
+    """
+    return ([(p, s.get('points', 0)) for p, s in stats_dict.items()],
+            [(t, s.get('points', 0)) for t, s in team_stats.items()])
+
+def saveSpeculation(round_number, pending, results, filepath='stats/speculation.pickle'):
+    """
+    Save speculated pairings for the next round.
+    results maps each outcome (tuple of 'W'/'D'/'L', one per pending game)
+    to the (standings signature, pairings) it leads to.
+    """
+    path = Path(filepath)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cache = {
+        'round': round_number,
+        'pending': pending,
+        'fingerprint': roundFingerprint(round_number, pending),
+        'results': results,
+    }
+    with open(path, mode='wb') as file:
+        pickle.dump(cache, file)
+    log.info(f'{filepath} saved.')
+
+def loadSpeculation(round_number, stats_dict, team_stats, filepath='stats/speculation.pickle'):
+    """
+    Return the pairings speculated for the round following round_number, if the
+    actual results match one of the speculated outcomes and lead to the same
+    standings. Returns None if there is no usable speculation.
+    """
+    path = Path(filepath)
+    if not path.exists():
+        return None
+    with open(path, mode='rb') as file:
+        cache = pickle.load(file)
+    if cache.get('round') != round_number:
+        return None
+    if cache['fingerprint'] != roundFingerprint(round_number, cache['pending']):
+        log.info('Speculated pairings are outdated, ignoring them')
+        return None
+
+    rows = loadRound(f'rounds/round{round_number}.csv')
+    outcome = tuple(gameOutcome(rows[0], rows[idx]) for idx in cache['pending'])
+    if outcome not in cache['results']:
+        return None
+    signature, pairings = cache['results'][outcome]
+    if signature != standingsSignature(stats_dict, team_stats):
+        # Same outcomes but different tie-breaks (e.g. touchdowns), the pairing may differ
+        log.info('Speculated standings differ from the actual ones, ignoring them')
+        return None
+    log.info(f'Using speculated pairings for outcome {"".join(outcome)}')
+    return pairings
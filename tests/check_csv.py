@@ -1,10 +1,11 @@
 import csv
+import sys
 import pathlib
 import logging as log
-import yaml
 
-with open('config/config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+# Reuse the configuration snapshot of the main script instead of parsing config.yaml again
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from globals import config
 
 def process_csv_files(folder_path, team_size):
     """
@@ -0,0 +1,93 @@
+import sys
+import random
+import pathlib
+import logging as log
+
+# Run from the repository root, as the main script (config/config.yaml is read from there)
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from globals import config, indiv_sort_key
+from ranking import Ranking
+from touchdowntracker import applyResult, enterResult
+
+header = ['PlayerA', 'PlayerB', 'TouchdownA', 'TouchdownB']
+
+def empty_stats(players):
+    return {p: {key: 0 for key in config['base_statistics'] + config['statistics'] + config['additional_statistics']} for p in players}
+
+def check_partial_updates(trials=200, steps=50, seed=0):
+    """
+    Compare Ranking.update on random partial updates (and new entries) with a
+    stable sort of the whole field on the previous order.
+
+    Returns:
+        bool: True if every update gave the same standings and ranks.
+    """
+    rng = random.Random(seed)
+    for trial in range(trials):
+        stats = {f'p{i}': {'points': rng.randint(0, 3), 'wins': rng.randint(0, 2), 'rank': 0} for i in range(rng.randint(1, 40))}
+        ranking = Ranking(indiv_sort_key)
+        ranking.update(stats, stats.keys())
+        order = sorted(stats, key=lambda p: indiv_sort_key(stats[p]))
+        for step in range(steps):
+            names = rng.sample(list(stats), rng.randint(0, min(len(stats), 12)))
+            for p in names:
+                stats[p].update(points=rng.randint(0, 3), wins=rng.randint(0, 2))
+            new = [f'q{trial}_{step}_{k}' for k in range(rng.randint(0, 2))]
+            for p in new:
+                stats[p] = {'points': rng.randint(0, 3), 'wins': rng.randint(0, 2), 'rank': 0}
+            ranking.update(stats, names + new)
+            order = sorted(order + new, key=lambda p: indiv_sort_key(stats[p]))
+            if list(ranking) != order or any(stats[p]['rank'] != i + 1 for i, p in enumerate(order)):
+                log.error(f'Ranking.update differs from a full sort (trial {trial}, step {step})')
+                return False
+    return True
+
+def check_score_entry(players=32, steps=400, seed=0):
+    """
+    Enter and correct random results with enterResult, and compare the stats
+    with a full recompute of the games entered so far, and the standings with
+    a stable sort of the whole field on the previous order.
+
+    Returns:
+        bool: True if every entry gave the same stats, standings and ranks.
+    """
+    rng = random.Random(seed)
+    names = [f'p{i}' for i in range(players)]
+    stats = empty_stats(names)
+    ranking = Ranking(indiv_sort_key)
+    ranking.update(stats, names)
+    order = list(ranking)
+    games = []
+    for step in range(steps):
+        if games and rng.random() < 0.3:
+            # Correct a result entered before
+            idx = rng.randrange(len(games))
+            previous = games[idx]
+            games[idx] = previous[:2] + [str(rng.randint(0, 4)), str(rng.randint(0, 4))]
+            enterResult(stats, ranking, header, games[idx], previous)
+        else:
+            games.append(rng.sample(names, 2) + [str(rng.randint(0, 4)), str(rng.randint(0, 4))])
+            enterResult(stats, ranking, header, games[-1])
+
+        expected = empty_stats(names)
+        for game in games:
+            applyResult(expected, header, game)
+        order = sorted(order, key=lambda p: indiv_sort_key(stats[p]))
+        if any({k: v for k, v in stats[p].items() if k != 'rank'} != {k: v for k, v in expected[p].items() if k != 'rank'} for p in names):
+            log.error(f'enterResult stats differ from a full recompute (step {step})')
+            return False
+        if list(ranking) != order or any(stats[p]['rank'] != i + 1 for i, p in enumerate(order)):
+            log.error(f'enterResult standings differ from a full sort (step {step})')
+            return False
+    return True
+
+if __name__ == "__main__":
+    log.basicConfig(format='%(levelname)s - %(message)s', level=log.INFO)
+    results = {
+        'Partial ranking updates': check_partial_updates(),
+        'Score entry and corrections': check_score_entry(),
+    }
+    print("\n--- Summary ---")
+    for name, ok in results.items():
+        print(f"{name}: {'OK' if ok else 'FAILED'}")
+    sys.exit(0 if all(results.values()) else 1)
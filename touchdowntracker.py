@@ -1,17 +1,27 @@
 # touchdowntracker.py
 
 import os
+import sys
 import random
 import csv
 import logging as log
 
+from itertools import product
 from globals import *
 from utils import *
+from ranking import Ranking
+from tracing import tracer
+from constraints import PairingConstraints
+from speculation import outcome_scores, unpredictedTieBreakers, pendingGames, fillOutcome, standingsSignature, saveSpeculation, loadSpeculation
 
-def generatePairing(round_number, players_dict, stats_dict):
+# Below this size of the largest bracket, starting worker processes costs more than pairing the brackets
+_parallel_bracket_size = 128
+
+def generatePairing(round_number, players_dict, stats_dict, workers=None):
     """
     Generate Swiss pairings for the given round.
     Supports both team-based and individual pairings, avoiding repeat matchups.
+    workers is the number of processes pairing score groups (pairing_workers by default).
     """
     team_size = int(config.get('team_size', 1))
 
@@ -34,28 +44,7 @@ def generatePairing(round_number, players_dict, stats_dict):
 
         team_pairings = dfs_team_recursive(teams, prev_team_games)
 
-        # For each team pairing, match individual players by rank
-        player_pairings = []
-        for t1, t2 in team_pairings:
-            log.debug(f'Pairing teams: {t1} vs {t2}')
-            if t1 == 'BYE':
-                team1_sorted = ['BYE' for _ in range(team_size)]
-                team2_players = [p for p in players_dict if players_dict[p].get('Team') == t2]
-                team2_sorted = sorted(team2_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
-            elif t2 == 'BYE':
-                team2_sorted = ['BYE' for _ in range(team_size)]
-                team1_players = [p for p in players_dict if players_dict[p].get('Team') == t1]
-                team1_sorted = sorted(team1_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999)) 
-            else:
-                team1_players = [p for p in players_dict if players_dict[p].get('Team') == t1]
-                team1_sorted = sorted(team1_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
-                team2_players = [p for p in players_dict if players_dict[p].get('Team') == t2]
-                team2_sorted = sorted(team2_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
-            for p1, p2 in zip(team1_sorted, team2_sorted):
-                log.debug(f'\tPairing players: {p1} vs {p2}')
-                player_pairings.append((p1, p2))
-            # If teams have unequal number of players, ignore extra players (no BYE)
-        return player_pairings
+        return pairTeamPlayers(team_pairings, players_dict, stats_dict)
     else:
         log.debug('Individual Swiss pairing mode')
         if (round_number==1): # first round
@@ -67,17 +56,10 @@ def generatePairing(round_number, players_dict, stats_dict):
                 log.debug('No stats, shuffling players randomly')
                 sorted_players = list(players_dict.keys())
                 random.shuffle(sorted_players)
-            pairings = []
-            for i in range(0, len(sorted_players)-1, 2):
-                log.debug(f'Pairing: {sorted_players[i]} vs {sorted_players[i+1]}')
-                pairings.append([sorted_players[i], sorted_players[i+1]])
-            if len(sorted_players) % 2 == 1:
-                log.debug(f'Assigning BYE to: {sorted_players[-1]}')
-                pairings.append([sorted_players[-1], 'BYE'])
-            return pairings
+            prev_games = []
         else:
             log.debug('Subsequent round pairing')
-            prev_games = []
+            sorted_players = list(players_dict.keys())
             last_round_file = f'rounds/round{round_number-1}.csv'
             if os.path.exists(last_round_file):
                 log.debug(f'Loading last round file: {last_round_file}')
@@ -88,21 +70,128 @@ def generatePairing(round_number, players_dict, stats_dict):
                         if len(row) < 4:
                             log.error('Round still in progress')
                             return []
-                        last_round.append(row)
-            for i in range(1, len(os.listdir('rounds/'))+1):
-                round = loadRound(f'rounds/round{i}.csv')
-                round = round[1:] # Skip header
-                for game in round:
-                    prev_games.append([game[0], game[1]])
-            pairings = dfs_recursive(players_dict, stats_dict, prev_games)
-            return pairings
-
-def dfs_recursive(players_dict, stats_dict, prev_games, pairings=[]):
+            prev_games = loadPreviousGames(round_number, 'Player')
+
+        constraints = PairingConstraints(players_dict, prev_games)
+        tracer.clear()
+        if config.get('pairing_mode', 'rank') == 'score_groups':
+            log.debug('Score group pairing')
+            if workers is None:
+                workers = int(config.get('pairing_workers', 1))
+            pairings = pairScoreGroups(sorted_players, stats_dict, constraints, workers)
+        else:
+            pairings = dfs_recursive({p: players_dict[p] for p in sorted_players}, stats_dict, constraints, [])
+        if not pairings:
+            tracer.dump(f'No valid pairing found for round {round_number}')
+        return pairings
+
+def pairTeamPlayers(team_pairings, players_dict, stats_dict):
+    """
+    For each team pairing, match individual players by rank.
+    Returns the list of player pairings, team_size games per team pairing.
     """
-    Recursively generate valid player pairings using DFS, avoiding repeat matchups.
+    team_size = int(config.get('team_size', 1))
+    player_pairings = []
+    for t1, t2 in team_pairings:
+        log.debug(f'Pairing teams: {t1} vs {t2}')
+        if t1 == 'BYE':
+            team1_sorted = ['BYE' for _ in range(team_size)]
+            team2_players = [p for p in players_dict if players_dict[p].get('Team') == t2]
+            team2_sorted = sorted(team2_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
+        elif t2 == 'BYE':
+            team2_sorted = ['BYE' for _ in range(team_size)]
+            team1_players = [p for p in players_dict if players_dict[p].get('Team') == t1]
+            team1_sorted = sorted(team1_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
+        else:
+            team1_players = [p for p in players_dict if players_dict[p].get('Team') == t1]
+            team1_sorted = sorted(team1_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
+            team2_players = [p for p in players_dict if players_dict[p].get('Team') == t2]
+            team2_sorted = sorted(team2_players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
+        for p1, p2 in zip(team1_sorted, team2_sorted):
+            log.debug(f'\tPairing players: {p1} vs {p2}')
+            player_pairings.append((p1, p2))
+        # If teams have unequal number of players, ignore extra players (no BYE)
+    return player_pairings
+
+def scoreGroups(players, stats_dict):
+    """
+    Partition players by points, highest first.
+    Each score group is ordered by rank, players without stats keeping their order.
+    """
+    groups = {}
+    for player in sorted(players, key=lambda p: stats_dict.get(p, {}).get('rank', 9999)):
+        groups.setdefault(stats_dict.get(player, {}).get('points', 0), []).append(player)
+    return [groups[points] for points in sorted(groups, reverse=True)]
+
+def pairBracket(bracket, stats_dict, constraints):
+    """
+    Pair the players of a single bracket, or return [] if it cannot be done.
+    """
+    return dfs_recursive(dict.fromkeys(bracket), stats_dict, constraints, [])
+
+def pairScoreGroups(players, stats_dict, constraints, workers=1):
+    """
+    Swiss pairing by score groups.
+    The lowest ranked player of an odd score group floats down to the next one,
+    then every bracket is paired on its own, in parallel if workers > 1 and
+    the largest bracket holds at least _parallel_bracket_size players.
+    A bracket that cannot be paired floats down as a whole and is paired again
+    with the next bracket (or with the previous one for the last bracket).
+    Returns a list of pairings, or [] if no valid pairing exists.
+    """
+    groups = scoreGroups(players, stats_dict)
+    brackets = []
+    floater = []
+    for idx, group in enumerate(groups):
+        bracket = floater + group
+        floater = []
+        if len(bracket) % 2 == 1 and idx < len(groups) - 1:
+            floater = [bracket.pop()]
+        if bracket:
+            brackets.append(bracket)
+    log.debug(f'Score group brackets: {[len(bracket) for bracket in brackets]}')
+
+    # Brackets are independent once floaters are set, pair them concurrently
+    bracket_stats = [{p: stats_dict[p] for p in bracket if p in stats_dict} for bracket in brackets]
+    if workers > 1 and len(brackets) > 1 and max(map(len, brackets)) >= _parallel_bracket_size:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(brackets))) as executor:
+            results = list(executor.map(pairBracket, brackets, bracket_stats, [constraints] * len(brackets)))
+    else:
+        results = [pairBracket(bracket, bstats, constraints) for bracket, bstats in zip(brackets, bracket_stats)]
+
+    solved = []  # (players, pairings) of the brackets paired so far
+    carry = []   # players of the brackets that could not be paired
+    for bracket, result in zip(brackets, results):
+        if carry:
+            bracket = carry + bracket
+            result = pairBracket(bracket, stats_dict, constraints)
+        if result:
+            solved.append((bracket, result))
+            carry = []
+        else:
+            tracer.trace('bracket_float', 'Bracket %s cannot be paired, floating it down', bracket)
+            carry = bracket
+    while carry:
+        if not solved:
+            return []
+        previous, _ = solved.pop()
+        carry = previous + carry
+        tracer.trace('bracket_merge', 'Last bracket cannot be paired, merging it up: %s', carry)
+        result = pairBracket(carry, stats_dict, constraints)
+        if result:
+            solved.append((carry, result))
+            carry = []
+    return [pairing for _, result in solved for pairing in result]
+
+def dfs_recursive(players_dict, stats_dict, constraints, pairings=[]):
+    """
+    Recursively generate valid player pairings using DFS, avoiding repeat matchups
+    and the pairings forbidden by the constraints (cf. PairingConstraints).
+    Opponents breaking the fewest soft constraints are tried first.
     Returns a list of pairings.
     """
-    log.debug(f'dfs_recursive called')
+    tracer.trace('dfs', 'dfs_recursive called with %d pairings', len(pairings), sampled=True)
     if len(pairings) * 2 >= len(players_dict):
         log.debug('All players paired, returning pairings')
         return pairings
@@ -111,9 +200,9 @@ def dfs_recursive(players_dict, stats_dict, prev_games, pairings=[]):
         used.add(p1)
         used.add(p2)
     remaining = [p for p in players_dict if p not in used]
-    log.debug(f'Remaining players: {remaining}')
+    tracer.trace('dfs_remaining', 'Remaining players: %s', remaining, sampled=True)
     if len(remaining) == 1:
-        log.debug(f'Only one player left: {remaining[0]}, assigning BYE')
+        tracer.trace('dfs_bye', 'Only one player left: %s, assigning BYE', remaining[0])
         pairings.append((remaining[0], 'BYE'))
         return pairings
     elif not remaining:
@@ -121,24 +210,24 @@ def dfs_recursive(players_dict, stats_dict, prev_games, pairings=[]):
         return pairings
     # Sort remaining by rank (lowest first)
     sorted_remaining = sorted(remaining, key=lambda p: stats_dict.get(p, {}).get('rank', 9999))
-    log.debug(f'Sorted remaining players by rank: {sorted_remaining}')
+    tracer.trace('dfs_sorted', 'Sorted remaining players by rank: %s', sorted_remaining, sampled=True)
     p1 = sorted_remaining[0]
-    for i in range(1, len(sorted_remaining)):
-        p2 = sorted_remaining[i]
-        log.debug(f'Trying to pair {p1} with {p2}')
-        if [p1, p2] not in prev_games and [p2, p1] not in prev_games:
-            log.debug(f'Pair {p1}-{p2} not in previous games, recursing')
-            result = dfs_recursive(players_dict, stats_dict, prev_games, pairings + [[p1, p2]])
+    candidates = sorted(sorted_remaining[1:], key=lambda p2: constraints.penalty(p1, p2))
+    for p2 in candidates:
+        tracer.trace('dfs_try', 'Trying to pair %s with %s', p1, p2, sampled=True)
+        if constraints.allowed(p1, p2):
+            tracer.trace('dfs_recurse', 'Pair %s-%s allowed, recursing', p1, p2, sampled=True)
+            result = dfs_recursive(players_dict, stats_dict, constraints, pairings + [[p1, p2]])
             if result:
-                log.debug(f'Recursion successful for pair {p1}-{p2}')
+                tracer.trace('dfs_success', 'Recursion successful for pair %s-%s', p1, p2, sampled=True)
                 return result
             else:
-                log.debug(f'Recursion failed for pair {p1}-{p2}')
-    log.debug('No valid pairings found, returning empty list')
+                tracer.trace('dfs_backtrack', 'Recursion failed for pair %s-%s', p1, p2, sampled=True)
+    tracer.trace('dfs_fail', 'No valid pairings found for %s, returning empty list', p1, sampled=True)
     return []
 
 def dfs_team_recursive(sorted_teams, prev_games, pairings=[]):
-    log.debug(f'dfs_team_recursive called with pairings: {pairings}')
+    tracer.trace('dfs_team', 'dfs_team_recursive called with pairings: %s', pairings, sampled=True, snapshot=True)
     if len(pairings) * 2 >= len(sorted_teams):
         log.debug('All teams paired, returning pairings')
         return pairings
@@ -147,9 +236,9 @@ def dfs_team_recursive(sorted_teams, prev_games, pairings=[]):
         used.add(t1)
         used.add(t2)
     remaining = [t for t in sorted_teams if t not in used]
-    log.debug(f'Remaining teams: {remaining}')
+    tracer.trace('dfs_team_remaining', 'Remaining teams: %s', remaining, sampled=True)
     if len(remaining) == 1:
-        log.debug(f'Only one team left: {remaining[0]}, assigning BYE')
+        tracer.trace('dfs_team_bye', 'Only one team left: %s, assigning BYE', remaining[0])
         pairings.append((remaining[0], 'BYE'))
         return pairings
     elif not remaining:
@@ -158,109 +247,263 @@ def dfs_team_recursive(sorted_teams, prev_games, pairings=[]):
     t1 = remaining[0]
     for i in range(1, len(remaining)):
         t2 = remaining[i]
-        log.debug(f'Trying to pair {t1} with {t2}')
+        tracer.trace('dfs_team_try', 'Trying to pair %s with %s', t1, t2, sampled=True)
         if [t1, t2] not in prev_games and [t2, t1] not in prev_games:
-            log.debug(f'Pair {t1}-{t2} not in previous games, recursing')
+            tracer.trace('dfs_team_recurse', 'Pair %s-%s not in previous games, recursing', t1, t2, sampled=True)
             result = dfs_team_recursive(sorted_teams, prev_games, pairings + [(t1, t2)])
             if result:
-                log.debug(f'Recursion successful for pair {t1}-{t2}')
+                tracer.trace('dfs_team_success', 'Recursion successful for pair %s-%s', t1, t2, sampled=True)
                 return result
             else:
-                log.debug(f'Recursion failed for pair {t1}-{t2}')
-    log.debug(f'No valid pairings found for {t1}, assigning BYE')
+                tracer.trace('dfs_team_backtrack', 'Recursion failed for pair %s-%s', t1, t2, sampled=True)
+    tracer.trace('dfs_team_fail', 'No valid pairings found for %s, assigning BYE', t1)
     pairings.append((t1, 'BYE'))
     return pairings
 
-def updateStats(players, stats, last_round):
+def repairPairing(round_number, players_dict, stats_dict, team_stats, withdrawn=(), added=()):
+    """
+    Repair the pairing of an already generated round after late drops or additions.
+    The tables of withdrawn players (or teams), the tables with a BYE and the added
+    players (or teams) are paired again together. If that is not possible without a
+    rematch, the nearest tables (tables are ordered by rank) are released one by one
+    and paired again with them. Every other table keeps its number, its players and
+    any score already entered. If fewer tables are needed, the freed tables are left
+    empty (BYE against BYE), or dropped at the end of the round.
+    In team mode, a withdrawn player whose team stays in leaves a BYE in its game.
+    Returns the rows of the repaired round (header first), or [] if no valid pairing exists.
+    """
+    team_size = int(config.get('team_size', 1))
+    size = team_size if team_size > 1 else 1
+    column = 'Team' if team_size > 1 else 'Player'
+    withdrawn, added = set(withdrawn), list(dict.fromkeys(added))
+
+    rows = loadRound(f'rounds/round{round_number}.csv')
+    header, games = rows[0], rows[1:]
+    if header != pairingRows([], players_dict)[0]:
+        raise ValueError(f'rounds/round{round_number}.csv columns do not match the current configuration')
+    a_index = header.index(f'{column}A')
+    b_index = header.index(f'{column}B')
+
+    if team_size > 1:
+        # Players withdrawn by an earlier repair are missing from the games of their team
+        present = {game[header.index(f'Player{side}')] for game in games for side in ('A', 'B')}
+        teams = {game[header.index(f'Team{side}')] for game in games for side in ('A', 'B')}
+        absent = {p for p, pdata in players_dict.items() if pdata.get('Team') in teams and p not in present}
+
+        # A withdrawn player of a team that stays in: the opponent gets a BYE
+        half = len(header) // 2
+        dropped = set()
+        for game in games:
+            for side, columns in (('A', range(0, half)), ('B', range(half, len(header)))):
+                if game[header.index(f'Player{side}')] in withdrawn:
+                    dropped.add(game[header.index(f'Player{side}')])
+                    for idx in columns:
+                        game[idx] = 'BYE' if header[idx] in (f'Team{side}', f'Player{side}') else ''
+        withdrawn -= dropped
+        # Rebuilt games of their team give a BYE to their opponent, whatever the repair
+        dropped |= absent
+        rank = lambda t: team_stats.get(t, {}).get('rank', 9999)
+        entrants = config.get('teams', {})
+        prev_games = loadPreviousGames(round_number, 'Team')
+    else:
+        rank = lambda p: stats_dict.get(p, {}).get('rank', 9999)
+        entrants = players_dict
+        prev_games = loadPreviousGames(round_number, 'Player')
+        constraints = PairingConstraints(players_dict, prev_games)
+
+    # Tables are the games of a pairing unit: one game, or team_size games in team mode
+    tables = [games[i:i + size] for i in range(0, len(games), size)]
+    units = []
+    for table in tables:
+        unit_a = next((game[a_index] for game in table if game[a_index] != 'BYE'), 'BYE')
+        unit_b = next((game[b_index] for game in table if game[b_index] != 'BYE'), 'BYE')
+        units.append((unit_a, unit_b))
+
+    paired = {u for unit in units for u in unit if u != 'BYE'}
+    for name in withdrawn:
+        if name not in paired:
+            raise ValueError(f"'{name}' is not paired in round {round_number}")
+    for name in added:
+        if name in paired:
+            raise ValueError(f"'{name}' is already paired in round {round_number}")
+        if name not in entrants:
+            raise ValueError(f"'{name}' not found in {config['players_file']}")
+    if not withdrawn and not added:
+        return rows
+
+    def solve(pool):
+        """Pair the pool by rank, or return None if it cannot be done without a rematch."""
+        if not pool:
+            return []
+        ranked = sorted(pool, key=rank)
+        if team_size > 1:
+            result = dfs_team_recursive(ranked, prev_games, [])
+            in_result = {u for pair in result for u in pair}
+            byes = sum(1 for pair in result if 'BYE' in pair)
+            return result if in_result >= set(pool) and byes <= len(pool) % 2 else None
+        result = dfs_recursive({p: players_dict[p] for p in ranked}, stats_dict, constraints, [])
+        return result or None
+
+    tracer.clear()
+    selected = {i for i, unit in enumerate(units) if withdrawn & set(unit) or 'BYE' in unit}
+    while True:
+        pool = [u for i in sorted(selected) for u in units[i] if u != 'BYE' and u not in withdrawn] + added
+        tracer.trace('repair', 'Repairing tables %s with %s', sorted(selected), pool)
+        result = solve(pool)
+        if result is not None:
+            break
+        candidates = [i for i in range(len(units)) if i not in selected]
+        if not candidates:
+            tracer.dump(f'No valid pairing found to repair round {round_number}')
+            return []
+        # Release the table closest to the ones being repaired
+        closest = min(candidates, key=lambda i: (min((abs(i - j) for j in selected), default=0), i))
+        tracer.trace('repair_release', 'Releasing table %d: %s', closest + 1, units[closest])
+        selected.add(closest)
+
+    if team_size > 1:
+        pairing = pairTeamPlayers(result, players_dict, stats_dict)
+        pairing = [tuple('BYE' if p in dropped else p for p in pair) for pair in pairing]
+    else:
+        pairing = result
+    new_rows = pairingRows(pairing, players_dict)[1:]
+    new_tables = [new_rows[i:i + size] for i in range(0, len(new_rows), size)]
+
+    # Fill the released tables in order, append the new tables if more are needed
+    kept = {i: table for i, table in enumerate(tables) if i not in selected}
+    slots = sorted(selected)
+    for slot, table in zip(slots, new_tables):
+        tables[slot] = table
+    repaired = slots[:len(new_tables)] + list(range(len(tables), len(tables) + len(new_tables) - len(slots)))
+    tables.extend(new_tables[len(slots):])
+
+    # If fewer are needed, free tables at the end of the round are dropped, the
+    # others are left empty (BYE against BYE) so that no other table is renumbered
+    free = slots[len(new_tables):]
+    placeholder = pairingRows([('BYE', 'BYE')] * size, players_dict)[1:]
+    for slot in free:
+        tables[slot] = [list(game) for game in placeholder]
+    while free and free[-1] == len(tables) - 1:
+        del tables[free.pop()]
+
+    for i, table in kept.items():
+        if tables[i] is not table:
+            raise RuntimeError(f'Repairing round {round_number} renumbered table {i + 1}')
+    if free:
+        log.info(f'Round {round_number}: tables {[slot + 1 for slot in free]} left empty')
+    log.info(f'Round {round_number}: repaired tables {[slot + 1 for slot in repaired]}')
+    return [header] + [game for table in tables for game in table]
+
+def applyResult(stats, header, game, sign=1):
+    """
+    Add the result of a single game to the stats of both players.
+    header is the first row of the round file, game one of its rows.
+    With sign=-1, the result is removed instead (to correct it).
+    Returns the list of players whose stats were updated.
+    """
+    pA_index = header.index('PlayerA')
+    pB_index = header.index('PlayerB')
+    tdA_index = header.index('TouchdownA')
+    tdB_index = header.index('TouchdownB')
+
+    pA, pB = game[pA_index], game[pB_index]
+    updated = []
+    for player in (pA, pB):
+        if player not in stats:
+            continue # BYE or unknown player
+        # Update points, wins, draws and losses
+        if (game[tdA_index] == '') or (game[tdB_index] == ''):
+            raise ValueError('Round still in progress - missing scores')
+        tdA, tdB = int(game[tdA_index]), int(game[tdB_index])
+        tracer.trace('game', '....Game found for player %s: %s vs %s, scores %d-%d', player, pA, pB, tdA, tdB, sampled=True)
+        if (pA == player and tdA > tdB) or (pB == player and tdB > tdA):
+            stats[player]["points"] += 4 * sign
+            stats[player]["wins"]   += sign
+        elif tdA == tdB:
+            stats[player]["points"] += 2 * sign
+            stats[player]["draws"]  += sign
+        else:
+            stats[player]["points"] += 0
+            stats[player]["losses"] += sign
+
+        # Update touchdowns scored/conceded (always first two columns after player names)
+        stats[player]["touchdown_scored"]   += sign * (tdA if pA == player else tdB)
+        stats[player]["touchdown_conceded"] += sign * (tdB if pA == player else tdA)
+        stats[player]["touchdown_diff"]     = stats[player]["touchdown_scored"] - stats[player]["touchdown_conceded"]
+
+        # Update stats based on header positions
+        for stat in config['statistics'] + config['additional_statistics']:
+            if stat not in config['base_statistics']: # Exclude mandatory stats
+                # Look for both statA and statB variations in headers
+                stat_a = f"{stat}A"
+                stat_b = f"{stat}B"
+
+                if stat_a in header and stat_b in header:
+                    idx_a = header.index(stat_a)
+                    idx_b = header.index(stat_b)
+                    # Add stat value based on whether player is A or B
+                    if pA == player:
+                        stats[player][stat] += sign * float(game[idx_a]) if game[idx_a] else 0
+                    else:
+                        stats[player][stat] += sign * float(game[idx_b]) if game[idx_b] else 0
+
+        tracer.trace('stats', '....Updated stats for %s: %s', player, stats[player], sampled=True, snapshot=True)
+        updated.append(player)
+    return updated
+
+def updateStats(players, stats, last_round, ranking=None):
     """
     Update player statistics based on the results of the last round.
+    ranking is the Ranking kept across rounds, a new one is built if not given.
     Returns a dictionary of updated stats, sorted and ranked.
     """
+    if ranking is None:
+        ranking = Ranking(indiv_sort_key)
+        ranking.update(stats, stats.keys())
+
+    # New players are ranked along with the ones whose results changed
+    updated = [player for player in players if player not in ranking]
     for player in players:
-        log.debug(f'Updating stats for player: {player}')
         stats.setdefault(player, {key: 0 for key in config['base_statistics'] + config['statistics'] + config['additional_statistics']})
-        log.debug(f'....Current stats: {stats.get(player, {})}')  
-        for game, idx in zip(last_round, range(len(last_round))):
-            
-            if idx == 0: # header
-                pA_index = game.index('PlayerA')
-                pB_index = game.index('PlayerB')
-                tdA_index = game.index('TouchdownA')
-                tdB_index = game.index('TouchdownB')
-            else:
-                if (game[pA_index] == player) or (game[pB_index] == player):
-                    # Update points, wins, draws and losses
-                    pA, pB = game[pA_index], game[pB_index]
-                    if (game[tdA_index] == '') or (game[tdB_index] == ''):
-                        raise ValueError('Round still in progress - missing scores')
-                    tdA, tdB = int(game[tdA_index]), int(game[tdB_index])
-                    log.debug(f'....Game found for player {player}: {pA} vs {pB}, scores {tdA}-{tdB}')
-                    if (pA == player and tdA > tdB) or (pB == player and tdB > tdA):
-                        stats[player]["points"] += 4
-                        stats[player]["wins"]   += 1
-                    elif tdA == tdB:
-                        stats[player]["points"] += 2
-                        stats[player]["draws"]  += 1
-                    else:
-                        stats[player]["points"] += 0
-                        stats[player]["losses"] += 1
-
-                    # Update touchdowns scored/conceded (always first two columns after player names)
-                    stats[player]["touchdown_scored"]   += tdA if pA == player else tdB
-                    stats[player]["touchdown_conceded"] += tdB if pA == player else tdA
-                    stats[player]["touchdown_diff"]     = stats[player]["touchdown_scored"] - stats[player]["touchdown_conceded"]
-                    
-                    # Get column headers from first row
-                    with open(f'rounds/round{round_number-1}.csv', 'r', encoding='utf-8') as f:
-                        headers = next(csv.reader(f))
-                    
-                    # Update stats based on header positions
-                    for stat in config['statistics'] + config['additional_statistics']:
-                        if stat not in config['base_statistics']: # Exclude mandatory stats
-                            # Look for both statA and statB variations in headers
-                            stat_a = f"{stat}A"
-                            stat_b = f"{stat}B"
-                            
-                            if stat_a in headers and stat_b in headers:
-                                idx_a = headers.index(stat_a)
-                                idx_b = headers.index(stat_b)
-                                # Add stat value based on whether player is A or B
-                                if pA == player:
-                                    stats[player][stat] += float(game[idx_a]) if game[idx_a] else 0
-                                else:
-                                    stats[player][stat] += float(game[idx_b]) if game[idx_b] else 0
-                            else:
-                                log.warning(f'Statistic {stat} not found in headers')
-                    
-                    log.debug(f'....Updated stats: {stats[player]}')
-                    log.debug(f'')
-    # Build sort key from indiv_tie_breakers
-    from globals import _tie_break_to_stat
-    sort_key_stats = []
-    for tie_break in config.get('indiv_tie_breakers', []):
-        if tie_break in _tie_break_to_stat:
-            log.debug(f'Sorting by tie breaker: {tie_break}')
-            sort_key_stats.append(_tie_break_to_stat[tie_break])
-    
-    # If no tie breakers defined, fall back to points and touchdown_scored
-    if not sort_key_stats:
-        sort_key_stats = ['points', 'touchdown_scored']
-    
-    # Sort by the dynamic tie breaker keys
-    def sort_key(item):
-        player_stats = item[1]
-        return tuple(player_stats.get(stat, 0) for stat in sort_key_stats)
-    
-    ranked_stats = dict(sorted(stats.items(), key=sort_key, reverse=True))
-    for rank, player in enumerate(ranked_stats, start=1):
-        ranked_stats[player]["rank"] = rank
-    return ranked_stats
 
-def updateTeamStats(players_dict, stats_dict, team_stats, last_round):
+    header = last_round[0]
+    for stat in config['statistics'] + config['additional_statistics']:
+        if stat not in config['base_statistics'] and (f'{stat}A' not in header or f'{stat}B' not in header):
+            log.warning(f'Statistic {stat} not found in headers')
+
+    for game in last_round[1:]:
+        try:
+            updated += applyResult(stats, header, game)
+        except ValueError:
+            tracer.dump(f'Statistics failed on game {game}')
+            raise
+
+    # Only move the players whose stats changed, ties keep the order of the previous standings
+    ranking.update(stats, updated)
+    return ranking.standings(stats)
+
+def enterResult(stats, ranking, header, game, previous=None):
+    """
+    Enter the result of a single game during a round and move its two players
+    in the standings, without going through the rest of the field.
+    To correct a result, previous is the game row as it was entered before.
+    Returns the range of standings positions whose rank changed.
+    """
+    updated = []
+    if previous is not None:
+        updated += applyResult(stats, header, previous, sign=-1)
+    updated += applyResult(stats, header, game)
+    return ranking.update(stats, updated)
+
+def updateTeamStats(players_dict, stats_dict, team_stats, last_round, ranking=None):
     """
     Aggregate player statistics into team statistics.
+    ranking is the team Ranking kept across rounds, a new one is built if not given.
     Returns a dictionary of team stats, sorted by performance using team_tie_breakers.
     """
+    if ranking is None:
+        ranking = Ranking(team_sort_key)
+        ranking.update(team_stats, team_stats.keys())
     for player, pdata in players_dict.items():
         team = pdata.get('Team', None)
         if not team:
@@ -311,27 +554,90 @@ def updateTeamStats(players_dict, stats_dict, team_stats, last_round):
             log.debug(f'....Team {team} awarded 0 points for loss')
 
     
-    # Build sort key from team_tie_breakers
-    sort_key_stats = []
-    for tie_break in config.get('team_tie_breakers', []):
-        from globals import _tie_break_to_stat
-        if tie_break in _tie_break_to_stat:
-            log.debug(f'Sorting teams by tie breaker: {tie_break}')
-            sort_key_stats.append(_tie_break_to_stat[tie_break])
-    
-    # If no tie breakers defined, fall back to points and touchdown_scored
-    if not sort_key_stats:
-        sort_key_stats = ['points', 'touchdown_scored']
-    
-    # Sort by the dynamic tie breaker keys
-    def sort_key(item):
-        team_stats_vals = item[1]
-        return tuple(team_stats_vals.get(stat, 0) for stat in sort_key_stats)
-    
-    sorted_teams = dict(sorted(team_stats.items(), key=sort_key, reverse=True))
-    for rank, team in enumerate(sorted_teams, start=1):
-        sorted_teams[team]["rank"] = rank
-    return sorted_teams
+    # Re-rank every team, ties keep the order of the previous standings
+    ranking.update(team_stats, list(team_stats))
+    return ranking.standings(team_stats)
+
+def computeStats(players_dict, rounds, export=False):
+    """
+    Aggregate player and team statistics over the given rounds (as returned by loadRound).
+    Returns the ranked player stats and team stats dictionaries.
+    """
+    if export:
+        # pyarrow/numpy are only loaded when exporting
+        from export import exportRound, exportKeys
+        export_keys = exportKeys(rounds)
+    stats_dict = {}
+    team_stats = {}
+    ranking = Ranking(indiv_sort_key)
+    team_ranking = Ranking(team_sort_key)
+    for round_idx, round_data in enumerate(rounds, start=1):
+        log.info(f'...from round {round_idx}')
+        stats_dict = updateStats(players_dict, stats_dict, round_data, ranking)
+        if config.get('team_size', 1) > 1:
+            team_stats = updateTeamStats(players_dict, stats_dict, team_stats, round_data, team_ranking)
+        if export:
+            exportRound(round_idx, round_data, stats_dict, team_stats, players_dict, export_keys[round_idx - 1])
+    return stats_dict, team_stats
+
+def speculateOutcome(outcome, players_dict, rounds, pending):
+    """
+    Compute the standings and the next round pairing for one outcome of the games in progress.
+    rounds holds every round up to the one in progress, which is last.
+    Returns the outcome and its (standings signature, pairings).
+    """
+    filled = fillOutcome(rounds[-1], pending, outcome)
+    stats_dict, team_stats = computeStats(players_dict, rounds[:-1] + [filled])
+    # Speculations already run in parallel
+    pairings = generatePairing(len(rounds) + 1, players_dict, stats_dict, workers=1)
+    return outcome, (standingsSignature(stats_dict, team_stats), pairings)
+
+def speculateRound(players_dict, round_number):
+    """
+    Precompute the pairing of the round following round_number while it is still played.
+    Every outcome (win, draw or loss) of the games with missing scores is enumerated,
+    and the standings and pairing it leads to are cached in stats/speculation.pickle.
+    Nothing is done if more than speculation_max_pending games are in progress, or
+    if a tie breaker depends on the scores (cf. unpredictedTieBreakers): the next
+    round is then computed normally once all scores are entered.
+    """
+    if round_number < 1:
+        log.info('No round in progress, nothing to speculate')
+        return
+    unpredicted = unpredictedTieBreakers()
+    if unpredicted:
+        log.warning(f'Tie breakers on {", ".join(unpredicted)} depend on the scores of the games in progress, '
+                    f'round {round_number + 1} will be computed once they are done')
+        return
+    rows = loadRound(f'rounds/round{round_number}.csv')
+    pending = pendingGames(rows)
+    max_pending = int(config.get('speculation_max_pending', 4))
+    if not pending:
+        log.info(f'Round {round_number} is complete, nothing to speculate')
+        return
+    if len(pending) > max_pending:
+        log.info(f'{len(pending)} games in progress (more than {max_pending}), round {round_number + 1} will be computed once they are done')
+        return
+
+    outcomes = list(product(outcome_scores, repeat=len(pending)))
+    rounds = [loadRound(f'rounds/round{i}.csv') for i in range(1, round_number)] + [rows]
+    workers = int(config.get('pairing_workers', 1))
+    log.info(f'Speculating round {round_number + 1} for {len(outcomes)} outcomes of {len(pending)} games in progress...')
+
+    # Per-outcome stats and pairing logs are not relevant
+    level = log.getLogger().level
+    log.getLogger().setLevel(max(level, log.ERROR))
+    try:
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                n = len(outcomes)
+                results = list(executor.map(speculateOutcome, outcomes, [players_dict] * n, [rounds] * n, [pending] * n))
+        else:
+            results = [speculateOutcome(outcome, players_dict, rounds, pending) for outcome in outcomes]
+    finally:
+        log.getLogger().setLevel(level)
+    saveSpeculation(round_number, pending, dict(results))
 
 if __name__ == '__main__':
 
@@ -344,6 +650,27 @@ if __name__ == '__main__':
     # Load players info
     players_dict = loadPlayers(filepath=config['players_file'])
 
+    # Repair the last round pairing, using the statistics it was generated from
+    if args.repair is not None:
+        last_round_number = len([f for f in os.listdir('rounds/') if f.endswith('.csv')])
+        if args.repair != last_round_number:
+            log.error(f'Only the last round (round {last_round_number}) can be repaired')
+            sys.exit(1)
+        stats_dict = loadStats() if os.path.exists('stats/statistics.csv') else {}
+        team_stats = loadStats('stats/team_statistics.csv') if os.path.exists('stats/team_statistics.csv') else {}
+        rows = repairPairing(args.repair, players_dict, stats_dict, team_stats, args.drop, args.add)
+        if not rows:
+            sys.exit(1)
+        saveRound(args.repair, rows)
+        pA_index, pB_index = rows[0].index('PlayerA'), rows[0].index('PlayerB')
+        savePairingHtml(args.repair, [(game[pA_index], game[pB_index]) for game in rows[1:]])
+        sys.exit(0)
+
+    # Precompute the next round for every outcome of the games still in progress
+    if args.speculate:
+        speculateRound(players_dict, len([f for f in os.listdir('rounds/') if f.endswith('.csv')]))
+        sys.exit(0)
+
     # Compute statistics
     round_number = len([f for f in os.listdir('rounds/') if f.endswith('.csv')]) + 1
     log.info(f'Round number: {round_number}')
@@ -356,15 +683,9 @@ if __name__ == '__main__':
             os.remove('stats/team_statistics.csv')
 
         # Load and aggregate stats from previous rounds
-        stats_dict = {}
-        team_stats = {}
-        for round_idx in range(1, round_number):
-            log.info(f'...from round {round_idx}')
-            round_data = loadRound(f'rounds/round{round_idx}.csv')
-            stats_dict = updateStats(players_dict, stats_dict, round_data)
-            if config.get('team_size', 1) > 1:
-                team_stats = updateTeamStats(players_dict, stats_dict, team_stats, round_data)
-        
+        rounds = [loadRound(f'rounds/round{round_idx}.csv') for round_idx in range(1, round_number)]
+        stats_dict, team_stats = computeStats(players_dict, rounds, export=args.export or config.get('export_columnar', False))
+
         # Save updated statistics
         saveStats(stats_dict)
         if config.get('team_size', 1) > 1:
@@ -372,9 +693,13 @@ if __name__ == '__main__':
     else:
         stats_dict = {}
 
-    # Generate next round
+    # Generate next round, unless it was speculated while the last games were played
     log.info(f'Generating round {round_number}...')
-    pairings=generatePairing(round_number, players_dict, stats_dict)
+    pairings = loadSpeculation(round_number - 1, stats_dict, team_stats) if round_number > 1 else None
+    if pairings is None:
+        pairings=generatePairing(round_number, players_dict, stats_dict)
+    elif os.path.exists('stats/speculation.pickle'):
+        os.remove('stats/speculation.pickle')
     if pairings != []:
         savePairing(round_number, pairings)
         savePairingHtml(round_number, pairings)
@@ -0,0 +1,58 @@
+import copy
+import time
+import logging as log
+
+from collections import deque
+from globals import *
+
+class Tracer:
+    """
+    Bounded trace of structured events for the pairing and stats hot paths.
+    Events are stored unformatted (event name, message, arguments) in a ring
+    buffer and only formatted when DEBUG logging is on or when the buffer is
+    dumped after a failure. Arguments are kept by reference, unless the event
+    is traced with snapshot=True.
+    """
+
+    def __init__(self, size=1000, sample=1):
+        self.events = deque(maxlen=size)
+        self.sample = max(int(sample), 1)
+        self._counts = {}
+
+    def trace(self, event, msg, *args, sampled=False, snapshot=False):
+        """
+        Record an event, msg being a %-style format string for args.
+        If sampled is set, only one out of every `sample` events with the
+        same name is kept in the buffer (DEBUG logging still sees them all).
+        If snapshot is set, args that are mutated afterwards (dicts, lists)
+        are copied, only when the event is actually kept.
+        """
+        log.debug(msg, *args)
+        if sampled and self.sample > 1:
+            count = self._counts.get(event, 0) + 1
+            self._counts[event] = count
+            if count % self.sample:
+                return
+        if snapshot:
+            args = tuple(copy.copy(arg) for arg in args)
+        self.events.append((time.perf_counter(), event, msg, args))
+
+    def clear(self):
+        self.events.clear()
+        self._counts.clear()
+
+    def dump(self, reason, level=log.ERROR):
+        """
+        Log the buffered events, oldest first, then clear the buffer.
+        """
+        log.log(level, f'{reason} - last {len(self.events)} trace events:')
+        start = self.events[0][0] if self.events else 0
+        for timestamp, event, msg, args in self.events:
+            try:
+                text = msg % args
+            except (TypeError, ValueError):
+                text = f'{msg} {args}'
+            log.log(level, f'....[{timestamp - start:9.6f}s] {event}: {text}')
+        self.clear()
+
+tracer = Tracer(config.get('trace_buffer', 1000), config.get('trace_sample', 1))
@@ -1,7 +1,6 @@
 
 import csv
 import logging as log
-import yaml
 
 from pathlib import Path
 from globals import *
@@ -13,10 +12,19 @@ def loadPlayers(filepath='config/players.csv'):
     """
     players = {}
     teams = {}
+    team_config = {}
     path = Path(filepath)
     if not path.exists():
         raise FileNotFoundError(f'{filepath} not found.')
 
+    # Reuse the players compiled by a previous run if the players file, tiers.yaml and this file did not change
+    players_hash = fileHash(path, 'config/tiers.yaml', __file__)
+    cached = snapshot.get('players', {}).get(str(path))
+    if cached and cached[0] == players_hash:
+        _, players, team_config = cached
+        config.update(team_config)
+        return players
+
     with open(path, mode='r', encoding='utf-8') as file:
         reader = csv.reader(file)
         header = next(reader)
@@ -35,8 +43,9 @@ def loadPlayers(filepath='config/players.csv'):
                     raise ValueError(f"Player '{name}' has no team assigned.")
                 teams.setdefault(team_name, []).append(name)
 
-    # If we have teams, validate team sizes
-    if has_team and teams:
+    # If we have teams and play as teams, validate team sizes
+    # (in individual play, the Team column is only used by pairing constraints)
+    if has_team and teams and int(config.get('team_size', 1)) > 1:
         team_sizes = {team: len(roster) for team, roster in teams.items()}
         unique_sizes = set(team_sizes.values())
         if len(unique_sizes) > 1:
@@ -44,10 +53,12 @@ def loadPlayers(filepath='config/players.csv'):
             raise ValueError(f"Inconsistent team sizes detected -> {mismatch}")
         config['team_size'] = unique_sizes.pop()
         config['teams'] = teams
+        team_config = {'team_size': config['team_size'], 'teams': teams}
     
     # If we track tier, assign values based on tiers.yaml
 
     if 'tier' in config['statistics']:
+        import yaml
         with open('config/tiers.yaml', 'r', encoding='utf-8') as f:
             tiers = yaml.safe_load(f)
 
@@ -56,6 +67,8 @@ def loadPlayers(filepath='config/players.csv'):
                 raise ValueError(f"Race '{players[player]['Race']}' for player '{player}' has no tier defined in tiers.yaml.")
             players[player]['tier'] = tiers[players[player]['Race']]
 
+    snapshot.setdefault('players', {})[str(path)] = (players_hash, players, team_config)
+    saveSnapshot(snapshot)
     return players
     
 def loadStats(filepath='stats/statistics.csv'):
@@ -124,6 +137,62 @@ def loadRound(filepath='rounds/round1.csv'):
             round.append(row)
     return round
 
+def loadPreviousGames(round_number, column='Player'):
+    """
+    Load the matchups played before the given round.
+    Returns a list of [A, B] pairs read from the {column}A and {column}B
+    columns ('Player' or 'Team') of every previous round file.
+    """
+    prev_games = []
+    for i in range(1, round_number):
+        round = loadRound(f'rounds/round{i}.csv')
+        header = round[0]
+        a_index = header.index(f'{column}A')
+        b_index = header.index(f'{column}B')
+        for game in round[1:]:
+            if game[a_index] and game[b_index]:
+                prev_games.append([game[a_index], game[b_index]])
+    return prev_games
+
+def pairingRows(pairing, players_dict):
+    """
+    Build the rows of a round file (header first) for the given pairings.
+    Handles both team and individual formats.
+    """
+    team_size = int(config.get('team_size', 1))
+    rows = []
+    if team_size > 1:
+        # Write header with stats columns based on tie breaks and additional stats
+        header = ['TeamA', 'PlayerA', 'TouchdownA']
+        for stat in config['statistics'] + config['additional_statistics']:
+            if stat not in config['base_statistics']:
+                header.append(f'{stat}A')
+        header_part_size = len(header)
+        header += ['TeamB', 'PlayerB', 'TouchdownB']
+        for stat in config['statistics'] + config['additional_statistics']:
+            if stat not in config['base_statistics']:
+                header.append(f'{stat}B')
+        rows.append(header)
+        for game in pairing:
+            pA, pB = game[0], game[1]
+
+            row = [''] * (2*header_part_size)
+
+            row[header.index('TeamA')] = players_dict.get(pA, {}).get('Team', '') if pA != 'BYE' else 'BYE'
+            row[header.index('PlayerA')] = pA
+            row[header.index('TeamB')] = players_dict.get(pB, {}).get('Team', '') if pB != 'BYE' else 'BYE'
+            row[header.index('PlayerB')] = pB
+
+            if 'tier' in config['statistics'] + config['additional_statistics']:
+                row[header.index('tierA')] = players_dict.get(pA, {}).get('tier', '') if pA != 'BYE' else ''
+                row[header.index('tierB')] = players_dict.get(pB, {}).get('tier', '') if pB != 'BYE' else ''
+            rows.append(row)
+    else:
+        rows.append(['PlayerA', 'PlayerB', 'TouchdownA', 'TouchdownB'])
+        for game in pairing:
+            rows.append([game[0], game[1], '', ''])
+    return rows
+
 def savePairing(round_number, pairing):
     """
     Save the pairings for a round to a CSV file.
@@ -137,40 +206,23 @@ def savePairing(round_number, pairing):
     from inspect import currentframe
     frame = currentframe()
     players_dict = frame.f_back.f_locals.get('players_dict', {})
-    team_size = int(config.get('team_size', 1))
 
     with open(path, mode='w', encoding='utf-8', newline="") as file:
         writer = csv.writer(file)
-        if team_size > 1:
-            # Write header with stats columns based on tie breaks and additional stats
-            header = ['TeamA', 'PlayerA', 'TouchdownA']
-            for stat in config['statistics'] + config['additional_statistics']:
-                if stat not in config['base_statistics']:
-                    header.append(f'{stat}A')
-            header_part_size = len(header)
-            header += ['TeamB', 'PlayerB', 'TouchdownB']
-            for stat in config['statistics'] + config['additional_statistics']:
-                if stat not in config['base_statistics']:
-                    header.append(f'{stat}B')
-            writer.writerow(header)
-            for game in pairing:
-                pA, pB = game[0], game[1]
-
-                row = [''] * (2*header_part_size)
+        writer.writerows(pairingRows(pairing, players_dict))
+    log.info(f'{path} saved.')
 
-                row[header.index('TeamA')] = players_dict.get(pA, {}).get('Team', '') if pA != 'BYE' else 'BYE'
-                row[header.index('PlayerA')] = pA
-                row[header.index('TeamB')] = players_dict.get(pB, {}).get('Team', '') if pB != 'BYE' else 'BYE'
-                row[header.index('PlayerB')] = pB
+def saveRound(round_number, rows):
+    """
+    Save the rows of a round (header first, as returned by loadRound) to its CSV file.
+    """
+    filepath = f'rounds/round{round_number}.csv'
+    path = Path(filepath)
+    path.parent.mkdir(parents=True, exist_ok=True)
 
-                if 'tier' in config['statistics'] + config['additional_statistics']:
-                    row[header.index('tierA')] = players_dict.get(pA, {}).get('tier', '') if pA != 'BYE' else ''
-                    row[header.index('tierB')] = players_dict.get(pB, {}).get('tier', '') if pB != 'BYE' else ''
-                writer.writerow(row)
-        else:
-            writer.writerow(['PlayerA', 'PlayerB', 'TouchdownA', 'TouchdownB'])
-            for game in pairing:
-                writer.writerow([game[0], game[1], '', ''])
+    with open(path, mode='w', encoding='utf-8', newline="") as file:
+        writer = csv.writer(file)
+        writer.writerows(rows)
     log.info(f'{path} saved.')
 
 def savePairingHtml(round_number, pairing):